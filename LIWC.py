@@ -28,7 +28,7 @@ def create_speakers(conversations):
     return corpus_speakers
 
 
-def create_utterances(conversations):
+def create_utterances(conversations, corpus_speakers):
     """Creates a convokit utterances class."""
     utterance_corpus = {}
     ut_id = 1
@@ -57,20 +57,10 @@ def create_utterances(conversations):
     return utterance_list
 
 
-def create_2pers_convs(conversations):
-    conv_2pers = []
-    for conv in conversations:
-        if conv.n_speakers() == 2:
-            conv_2pers.append(conv)
-    return conv_2pers
-
-
-if __name__ == "__main__":
-    with open('pickles.p', 'rb') as f:
-        conversations = pickle.load(f)
-
+def fit_coordination(conversations):
+    """Convokit corpus of the conversations and coordination fit on it."""
     corpus_speakers = create_speakers(conversations)
-    utterance_list = create_utterances(conversations)
+    utterance_list = create_utterances(conversations, corpus_speakers)
 
     # Creating a convokit corpus class
     BCN_corpus = Corpus(utterances=utterance_list)
@@ -81,95 +71,57 @@ if __name__ == "__main__":
     # Transform the BCN corpus into a coordination class
     # (this can deal with the LIWC scores)
     coord.transform(BCN_corpus)
+    return BCN_corpus, coord
 
-    # Example code to create alignment scores from the 40-49 age group to all others
+
+def score_age_groups(BCN_corpus, coord, leads=range(10, 90, 10)):
+    """LIWC alignment score reports from the leads to all age groups.
+
+    Returns {(lead, target): (score_by_marker, agg1, agg2, agg3)} where
+    groups are named after their lowest age, e.g. 80 for 80-89.
+    """
     # Creating the speaker sets based on age groups
-    _10_19 = list(BCN_corpus.iter_speakers(lambda speaker: speaker.meta['age'] > 9 and speaker.meta['age'] < 20))
-    _20_29 = list(BCN_corpus.iter_speakers(lambda speaker: speaker.meta['age'] > 19 and speaker.meta['age'] < 30))
-    _30_39 = list(BCN_corpus.iter_speakers(lambda speaker: speaker.meta['age'] > 29 and speaker.meta['age'] < 40))
-    _40_49 = list(BCN_corpus.iter_speakers(lambda speaker: speaker.meta['age'] > 39 and speaker.meta['age'] < 50))
-    _50_59 = list(BCN_corpus.iter_speakers(lambda speaker: speaker.meta['age'] > 49 and speaker.meta['age'] < 60))
-    _60_69 = list(BCN_corpus.iter_speakers(lambda speaker: speaker.meta['age'] > 59 and speaker.meta['age'] < 70))
-    _70_79 = list(BCN_corpus.iter_speakers(lambda speaker: speaker.meta['age'] > 69 and speaker.meta['age'] < 80))
-    _80_89 = list(BCN_corpus.iter_speakers(lambda speaker: speaker.meta['age'] > 79 and speaker.meta['age'] < 90))
-
-    # Creating coord.score objects for the 80-89 age group against all other age groups
-    _80to10 = coord.score(BCN_corpus, _80_89, _10_19)
-    _80to20 = coord.score(BCN_corpus, _80_89, _20_29)
-    _80to30 = coord.score(BCN_corpus, _80_89, _30_39)
-    _80to40 = coord.score(BCN_corpus, _80_89, _40_49)
-    _80to50 = coord.score(BCN_corpus, _80_89, _50_59)
-    _80to60 = coord.score(BCN_corpus, _80_89, _60_69)
-    _80to70 = coord.score(BCN_corpus, _80_89, _70_79)
-    _80to80 = coord.score(BCN_corpus, _80_89, _80_89)
-
-    f = open("80to.txt", 'a')
-
-    _, score_by_marker, agg1, agg2, agg3 = coord.score_report(BCN_corpus, _80to10)
-    f.write("80 to 10\n")
-    f.write(str(score_by_marker) + '\n')
-    f.write(str(agg1) + '\n')
-    f.write(str(agg2) + '\n')
-    f.write(str(agg3) + '\n')
-    f.write("\n")
-
-    _, score_by_marker, agg1, agg2, agg3 = coord.score_report(BCN_corpus, _80to20)
-    f.write("80 to 20\n")
-    f.write(str(score_by_marker) + '\n')
-    f.write(str(agg1) + '\n')
-    f.write(str(agg2) + '\n')
-    f.write(str(agg3) + '\n')
-    f.write("\n")
-
-    _, score_by_marker, agg1, agg2, agg3 = coord.score_report(BCN_corpus, _80to30)
-    f.write("80 to 30\n")
-    f.write(str(score_by_marker) + '\n')
-    f.write(str(agg1) + '\n')
-    f.write(str(agg2) + '\n')
-    f.write(str(agg3) + '\n')
-    f.write("\n")
-
-    _, score_by_marker, agg1, agg2, agg3 = coord.score_report(BCN_corpus, _80to40)
-    f.write("80 to 40\n")
-    f.write(str(score_by_marker) + '\n')
-    f.write(str(agg1) + '\n')
-    f.write(str(agg2) + '\n')
-    f.write(str(agg3) + '\n')
-    f.write("\n")
-
-    _, score_by_marker, agg1, agg2, agg3 = coord.score_report(BCN_corpus, _80to50)
-    f.write("80 to 50\n")
-    f.write(str(score_by_marker) + '\n')
-    f.write(str(agg1) + '\n')
-    f.write(str(agg2) + '\n')
-    f.write(str(agg3) + '\n')
-    f.write("\n")
-
-    _, score_by_marker, agg1, agg2, agg3 = coord.score_report(BCN_corpus, _80to60)
-    f.write("80 to 60\n")
-    f.write(str(score_by_marker) + '\n')
-    f.write(str(agg1) + '\n')
-    f.write(str(agg2) + '\n')
-    f.write(str(agg3) + '\n')
-    f.write("\n")
-
-    _, score_by_marker, agg1, agg2, agg3 = coord.score_report(BCN_corpus, _80to70)
-    f.write("80 to 70\n")
-    f.write(str(score_by_marker) + '\n')
-    f.write(str(agg1) + '\n')
-    f.write(str(agg2) + '\n')
-    f.write(str(agg3) + '\n')
-    f.write("\n")
-
-    _, score_by_marker, agg1, agg2, agg3 = coord.score_report(BCN_corpus, _80to80)
-    f.write("80 to 80\n")
-    f.write(str(score_by_marker) + '\n')
-    f.write(str(agg1) + '\n')
-    f.write(str(agg2) + '\n')
-    f.write(str(agg3) + '\n')
-    f.write("\n")
-
-    f.close()
+    groups = {}
+    for low in range(10, 90, 10):
+        groups[low] = list(BCN_corpus.iter_speakers(
+            lambda speaker, low=low: speaker.meta['age'] > low - 1 and
+            speaker.meta['age'] < low + 10))
+
+    reports = {}
+    for lead in leads:
+        for target, targets in groups.items():
+            score = coord.score(BCN_corpus, groups[lead], targets)
+            reports[lead, target] = coord.score_report(BCN_corpus, score)[1:]
+    return reports
+
+
+def write_reports(reports, path):
+    """Write reports of score_age_groups as a block per pair of groups."""
+    with open(path, 'w') as f:
+        for (lead, target), report in reports.items():
+            f.write(f"{lead} to {target}\n")
+            for part in report:
+                f.write(str(part) + '\n')
+            f.write("\n")
+
+
+def create_2pers_convs(conversations):
+    conv_2pers = []
+    for conv in conversations:
+        if conv.n_speakers() == 2:
+            conv_2pers.append(conv)
+    return conv_2pers
+
+
+if __name__ == "__main__":
+    with open('pickles.p', 'rb') as f:
+        conversations = pickle.load(f)
+
+    BCN_corpus, coord = fit_coordination(conversations)
+
+    # Alignment scores from the 80-89 age group to all age groups
+    reports = score_age_groups(BCN_corpus, coord, leads=[80])
+    write_reports(reports, "80to.txt")
 
 
     # Generating an analogue result to
@@ -17,55 +17,40 @@ Changes made to the original software:
 - Convert Python2 to Python3
 - Add tqdm and other code optimizations
 - Make code more likely to conform to PEP8
+- Split parsing from scoring so parses can be stored and scored offline
+- Replace zss trees by integer coded trees, see treecode.py
+- Skip and cache repeated tree edit distances
+- Move CoreNLP parsing to cassim_parse.py
 """
 
-from tqdm import tqdm
 import numpy as np
-import nltk
-from nltk.parse.corenlp import CoreNLPParser
-from nltk.tree import ParentedTree
-from zss import simple_distance, Node
 
-numnodes = 0
+from cassim_parse import Parser
+import treecode
 
 
 class Cassim():
     """Cassim main class."""
 
-    def __init__(self):
-        """ """
-        self.sent_detector = nltk.data.load('tokenizers/punkt/english.pickle')
-        self.parser = CoreNLPParser(url='http://localhost:9000')
-
-    def convert_mytree(self, nltktree, pnode):
-        """ """
-        global numnodes
-        for node in nltktree:
-            numnodes += 1
-            if type(node) is nltk.ParentedTree:
-                tempnode = Node(node.label())
-                pnode.addkid(tempnode)
-                self.convert_mytree(node, tempnode)
-        return pnode
-
-    def syntax_similarity_conversation(self, documents1):
-        """Syntax similarity of each document with its before and after."""
-        global numnodes
-        documents1parsed = []
-
-        # Detect sentences and parse them
-        for d1 in tqdm(range(len(documents1))):
-            tempsents = (self.sent_detector.tokenize(documents1[d1].strip()))
-            for s in tempsents:
-                if len(s.split()) > 70:
-                    documents1parsed.append("NA")
-                    break
-            else:
-                temp = list(self.parser.raw_parse_sents((tempsents)))
-                for i in range(len(temp)):
-                    temp[i] = list(temp[i])[0]
-                    temp[i] = ParentedTree.convert(temp[i])
-                documents1parsed.append(list(temp))
+    def __init__(self, offline=False):
+        """Offline instances only score stored parses and need no server."""
+        self.parser = None if offline else Parser()
+
+    def syntax_similarity_conversation(self, documents1, parsed=False):
+        """Syntax similarity of each document with its before and after.
+
+        If parsed, documents1 is the output of Parser.parse_conversation, or
+        lists of treecode.CodedTree instead of bracketed strings. Otherwise it
+        is parsed, which offline instances cannot do.
+        """
+        if not parsed:
+            if self.parser is None:
+                raise ValueError('offline Cassim cannot parse, give it parsed '
+                                 'documents with parsed=True')
+            documents1 = self.parser.parse_trees(documents1)
+        documents1parsed = [d if d == "NA" else
+                            [treecode.encode(s) for s in d]
+                            for d in documents1]
 
         results = []
         for d1 in range(len(documents1parsed) - 1):
@@ -75,20 +60,11 @@ class Cassim():
                 continue
 
             costMatrix = []
-            for i in range(len(documents1parsed[d1])):
-                numnodes = 0
-                tempnode = Node(documents1parsed[d1][i].root().label())
-                sentencedoc1 = self.convert_mytree(documents1parsed[d1][i],
-                                                   tempnode)
+            for sentencedoc1 in documents1parsed[d1]:
                 temp_costMatrix = []
-                sen1nodes = numnodes
-                for j in range(len(documents1parsed[d2])):
-                    numnodes = .0
-                    tempnode = Node(documents1parsed[d2][j].root().label())
-                    sentencedoc2 = self.convert_mytree(documents1parsed[d2][j],
-                                                       tempnode)
-                    ED = simple_distance(sentencedoc1, sentencedoc2)
-                    ED /= (numnodes + sen1nodes)
+                for sentencedoc2 in documents1parsed[d2]:
+                    ED = treecode.cached_distance(sentencedoc1, sentencedoc2)
+                    ED /= (sentencedoc1.size + sentencedoc2.size)
                     temp_costMatrix.append(ED)
                 costMatrix.append(temp_costMatrix)
             costMatrix = np.array(costMatrix)
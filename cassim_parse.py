@@ -0,0 +1,86 @@
+"""File: cassim_parse.py
+
+Authors: Mattijs Blankesteijn & András Csirik
+Computational Dialogue Modelling 2020
+
+This file contains the CoreNLP parsing of CASSIM (see cassim.py), apart
+from the scoring so that stored parses stay valid when the scoring changes.
+Like cassim.py it is based on software released under GPLv2.
+"""
+
+from tqdm import tqdm
+import nltk
+import requests
+from nltk.parse.corenlp import CoreNLPParser
+
+
+class Parser():
+    """CoreNLP parser for CASSIM, needs the server (see nlp_server.py)."""
+
+    def __init__(self):
+        """ """
+        self.sent_detector = nltk.data.load('tokenizers/punkt/english.pickle')
+        self.parser = CoreNLPParser(url='http://localhost:9000')
+
+    def parse_trees(self, documents1):
+        """Parse each document as a list of nltk trees, one per sentence.
+
+        Documents with a sentence longer than 70 words are parsed as "NA".
+        """
+        documents1parsed = []
+
+        # Detect sentences and parse them
+        for d1 in tqdm(range(len(documents1))):
+            tempsents = (self.sent_detector.tokenize(documents1[d1].strip()))
+            for s in tempsents:
+                if len(s.split()) > 70:
+                    documents1parsed.append("NA")
+                    break
+            else:
+                temp = list(self.parser.raw_parse_sents((tempsents)))
+                documents1parsed.append([list(t)[0] for t in temp])
+
+        return documents1parsed
+
+    def parse_conversation(self, documents1):
+        """Parse each document as a list of bracketed sentence strings.
+
+        The result can be pickled and given to
+        Cassim.syntax_similarity_conversation later, so scoring does not
+        need the CoreNLP server.
+        """
+        return [d if d == "NA" else
+                [t.pformat(margin=float('inf')) for t in d]
+                for d in self.parse_trees(documents1)]
+
+
+def get_doc(case):
+    """Get conversation text lose BNC2014 information (CASSIM CoreNLP)."""
+    text = case.get_conversation()
+    return [ut for (_, ut) in text]
+
+
+def parse_cases(cases, ignore_longer=1300):
+    """Stored parses by id of Conversations with at most ignore_longer lines.
+
+    A Conversation that fails to parse is printed and skipped. Raises if the
+    server cannot be reached or if no Conversation could be parsed.
+    """
+    parser = Parser()
+    parses, tried = {}, 0
+
+    for i, case in enumerate(cases):
+        if len(case.lines) > ignore_longer:
+            continue
+        tried += 1
+
+        try:
+            parses[case.id] = parser.parse_conversation(get_doc(case))
+        except requests.exceptions.ConnectionError:
+            raise
+        except Exception as e:
+            print(i, e)
+
+    if tried and not parses:
+        raise RuntimeError(f'none of {tried} Conversations could be parsed')
+    return parses
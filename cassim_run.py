@@ -6,8 +6,92 @@ Computational Dialogue Modelling 2020
 This file contains code to run CASSIM on Conversations.
 """
 
+import os
 import pickle
+import tempfile
+from multiprocessing import get_context
+
 from cassim import Cassim
+from cassim_parse import get_doc, parse_cases
+import treecode
+
+# Trees memory mapped by each worker of score_parses.
+_trees = None
+
+
+def parse(start, end, ignore_longer=1300, store='pickles_cassim.p'):
+    """Parse Conversations once and store the trees with the corpus.
+
+    Needs the CoreNLP server, see nlp_server.py.
+    """
+    with open(store, 'rb') as f:
+        conversations = pickle.load(f)
+
+    parses = parse_cases(conversations[start:end], ignore_longer)
+    for case in conversations[start:end]:
+        if case.id in parses:
+            case.syntax_parses = parses[case.id]
+
+    with open(store, 'wb') as f:
+        pickle.dump(conversations, f)
+
+
+def _load_trees(path):
+    """Pool initializer, memory maps the trees saved by score_parses."""
+    global _trees
+    _trees = treecode.load(path, mmap_mode='r')
+
+
+def _score_coded(docs):
+    """Score one Conversation of indices into _trees, None if it fails."""
+    try:
+        return Cassim(offline=True).syntax_similarity_conversation(
+            [d if d == "NA" else [_trees[i] for i in d] for d in docs],
+            parsed=True)
+    except Exception as e:
+        print(e)
+
+
+def score_parses(parses, processes=None, method=None):
+    """Score stored parses of Conversations in a pool of processes.
+
+    All trees are encoded once and saved, and the workers memory map them
+    instead of each parsing and encoding their own copy. Method is the
+    multiprocessing start method. Returns a score or None per Conversation.
+    """
+    trees, coded = [], []
+    for docs in parses:
+        coded.append([])
+        for d in docs:
+            if d == "NA":
+                coded[-1].append(d)
+            else:
+                coded[-1].append(list(range(len(trees), len(trees) + len(d))))
+                trees.extend(treecode.encode(s) for s in d)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'trees')
+        treecode.save(trees, path)
+        with get_context(method).Pool(processes, _load_trees,
+                                      (path,)) as pool:
+            return pool.map(_score_coded, coded)
+
+
+def run_offline(start=None, end=None, processes=None,
+                store='pickles_cassim.p'):
+    """Score Conversations from parses stored by parse(), without server."""
+    with open(store, 'rb') as f:
+        conversations = pickle.load(f)
+
+    cases = [c for c in conversations[start:end]
+             if getattr(c, 'syntax_parses', None) is not None]
+    scores = score_parses([c.syntax_parses for c in cases], processes)
+    for case, score in zip(cases, scores):
+        if score is not None:
+            case.syntax_alignment = score
+
+    with open(store, 'wb') as f:
+        pickle.dump(conversations, f)
 
 
 def run(start, end, ignore_longer=1300):
@@ -30,9 +114,7 @@ def run(start, end, ignore_longer=1300):
     for i, case in enumerate(conversations[start:end]):
         if len(case.lines) > ignore_longer:
             continue
-        # Get conversation text lose BNC2014 information (CASSIM CoreNLP).
-        text = case.get_conversation()
-        doc = [ut for (_, ut) in text]
+        doc = get_doc(case)
 
         try:
             case.syntax_alignment = cs.syntax_similarity_conversation(doc)
@@ -65,3 +147,10 @@ if __name__ == '__main__':
     # run(1000, 1100)
     # run(1100, 1200)
     # run(1200, 1300)
+
+    # Or parse once (same slices as above) and score offline afterwards:
+    # parse(0, 100)
+    # ...
+    # $ python3 nlp_server.py
+    # run_offline()
+    pass
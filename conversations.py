@@ -130,6 +130,7 @@ class Conversation():
         self.lines = None
         self.soup = None
 
+        self.syntax_parses = None
         self.syntax_alignment = None
         self.lexical_alignment = None
 
@@ -241,21 +242,27 @@ class Conversation():
 
 
 def create_persons(store='persons.txt', dt="data/spoken/tagged"):
-    """Investigate tagged dataset on persons."""
+    """Investigate tagged dataset on persons.
+
+    Files and persons are written sorted, so the same dataset always gives
+    the same file (and Conversations with speakers in the same order).
+    """
     multi, total = 0, 0
     print(f'Reading from {dt}, writing to {store}...')
 
     with open(store, 'w') as f:
-        for file in os.listdir(dt):
+        for file in sorted(os.listdir(dt)):
             print(f'-- {file}')
             soup = BeautifulSoup(open(dt + "/" + file), "html5lib")
             utters = soup.find_all('u')
 
             # Discard unknown persons.
-            people = set([w.get('who') for w in utters if 'UNK' not in
-                          w.get('who')])
+            people = sorted(set([w.get('who') for w in utters if 'UNK' not
+                                 in w.get('who')]))
 
-            f.write(f'{file}, {people}\n')
+            # Written like a set, which investigate expects.
+            written = ', '.join(repr(person) for person in people)
+            f.write(f'{file}, {{{written}}}\n')
             if len(people) > 2:
                 multi += 1
             total += 1
@@ -264,8 +271,8 @@ def create_persons(store='persons.txt', dt="data/spoken/tagged"):
         f.write(f'{multi}, {total}\n')
         print(f'Done {multi}/{total}\n')
 
-def investigate(file, dt="data/spoken/metadata"):
-    """Investigate actual demographics."""
+def investigate(file, dt="data/spoken/metadata", loc='data/spoken/'):
+    """Investigate actual demographics, loc is passed to Conversation."""
     with open(file, 'r') as f:
         lines = f.readlines()
 
@@ -277,7 +284,7 @@ def investigate(file, dt="data/spoken/metadata"):
         file, persons = line.split('{')
         people = persons.split('}')[0].replace("'", "").split(', ')
         props = [Person(speakers[person]) for person in people]
-        conversations.append(Conversation(file, props))
+        conversations.append(Conversation(file, props, loc=loc))
 
     return conversations
 
@@ -0,0 +1,221 @@
+"""File: pipeline.py
+
+Authors: Mattijs Blankesteijn & András Csirik
+Computational Dialogue Modelling 2020
+
+This file contains the whole pipeline from BNC2014 to alignment scores as
+one command with the stages:
+- ingest: read speakers and Conversations from the BNC2014 (data folder).
+- segment: split Conversations into (speaker, utterance) turns.
+- parse: CoreNLP parse all turns, needs the server (see nlp_server.py).
+  Fails if the server cannot be reached, so nothing wrong gets stored.
+- cassim: score CASSIM on the stored parses, without server.
+- liwc: score LIWC alignment between age groups.
+- aggregate: add the scores to the Conversations and write the results.
+
+Every stage stores its output in the artifacts folder under the hash of its
+content. A stage only reruns when its inputs change: the outputs of the
+stages it needs, its options and its source files. Stages that do not need
+each other (e.g. parse and liwc) run at the same time.
+
+Run:
+$ python3 nlp_server.py
+$ python3 pipeline.py
+$ python3 nlp_server.py
+Once parsed, e.g. rescoring CASSIM after changing cassim.py needs no server.
+"""
+
+import argparse
+import hashlib
+import inspect
+import os
+import pickle
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from cassim_parse import parse_cases
+from cassim_run import score_parses
+from conversations import create_persons, investigate
+from LIWC import fit_coordination, score_age_groups, write_reports
+
+
+def ingest(inputs, args):
+    """Conversations with speakers as in conversations.py."""
+    store = os.path.join(args.artifacts, 'persons.txt')
+    create_persons(store, dt=os.path.join(args.data, 'tagged'))
+    return investigate(store, dt=os.path.join(args.data, 'metadata'),
+                       loc=os.path.join(args.data, ''))
+
+
+def segment(inputs, args):
+    """Conversations with their turns read in."""
+    conversations = inputs['ingest']
+    for conversation in conversations:
+        conversation.get_conversation()
+    return conversations
+
+
+def parse(inputs, args):
+    """Stored parses by Conversation id, see cassim_parse.parse_cases."""
+    return parse_cases(inputs['segment'], args.ignore_longer)
+
+
+def cassim(inputs, args):
+    """CASSIM alignment by Conversation id, see cassim_run.run_offline."""
+    ids = list(inputs['parse'])
+    # Spawn, as forking while other stages run in threads is unsafe.
+    scores = score_parses([inputs['parse'][i] for i in ids], args.processes,
+                          'spawn')
+    return {i: score for i, score in zip(ids, scores) if score is not None}
+
+
+def liwc(inputs, args):
+    """LIWC score reports between age groups, see LIWC.score_age_groups."""
+    return score_age_groups(*fit_coordination(inputs['segment']))
+
+
+def aggregate(inputs, args):
+    """Conversations with parses and CASSIM scores, and LIWC reports."""
+    conversations = inputs['segment']
+    for conversation in conversations:
+        conversation.syntax_parses = inputs['parse'].get(conversation.id)
+        conversation.syntax_alignment = inputs['cassim'].get(conversation.id)
+    return conversations, inputs['liwc']
+
+
+# Stage: (function, stages it needs, source files, options it depends on).
+# The source of the function itself is part of its inputs as well.
+STAGES = {
+    'ingest': (ingest, [], ['conversations.py'], []),
+    'segment': (segment, ['ingest'], ['conversations.py'], []),
+    'parse': (parse, ['segment'], ['cassim_parse.py'], ['ignore_longer']),
+    'cassim': (cassim, ['parse'], ['cassim.py', 'cassim_run.py',
+                                   'treecode.py'], []),
+    'liwc': (liwc, ['segment'], ['LIWC.py'], []),
+    'aggregate': (aggregate, ['segment', 'parse', 'cassim', 'liwc'], [], []),
+}
+
+
+def _sha256(path):
+    """Hash of the content of a file."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(2 ** 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fingerprint(folder):
+    """Hash of names, sizes and modification times of files in folder."""
+    h = hashlib.sha256()
+    for root, dirs, files in sorted(os.walk(folder)):
+        dirs.sort()
+        for file in sorted(files):
+            stat = os.stat(os.path.join(root, file))
+            h.update(f'{root}/{file} {stat.st_size} {stat.st_mtime_ns}\n'
+                     .encode())
+    return h.hexdigest()
+
+
+def _load(digest, args):
+    """Load an artifact by its content hash."""
+    with open(os.path.join(args.artifacts, digest + '.p'), 'rb') as f:
+        return pickle.load(f)
+
+
+def run_stage(name, digests, args):
+    """Run stage unless its output is stored, returns its content hash.
+
+    Digests holds the content hashes of the outputs of the needed stages.
+    """
+    func, needs, sources, options = STAGES[name]
+    key = hashlib.sha256(name.encode())
+    key.update(inspect.getsource(func).encode())
+    for need in needs:
+        key.update(digests[need].encode())
+    for source in sources:
+        key.update(_sha256(source).encode())
+    for option in options:
+        key.update(repr(getattr(args, option)).encode())
+    if name == 'ingest':
+        key.update(fingerprint(args.data).encode())
+
+    index = os.path.join(args.artifacts, f'{name}-{key.hexdigest()}')
+    if os.path.exists(index) and name not in args.force:
+        with open(index) as f:
+            digest = f.read().strip()
+        if os.path.exists(os.path.join(args.artifacts, digest + '.p')):
+            print(f'-- {name}: stored as {digest[:12]}')
+            return digest
+
+    print(f'-- {name}: running')
+    output = func({need: _load(digests[need], args) for need in needs}, args)
+    tmp = f'{index}.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(output, f)
+    digest = _sha256(tmp)
+    os.replace(tmp, os.path.join(args.artifacts, digest + '.p'))
+    with open(index, 'w') as f:
+        f.write(digest)
+    print(f'-- {name}: done as {digest[:12]}')
+    return digest
+
+
+def run(targets, args):
+    """Run targets and the stages they need, independent ones concurrently.
+
+    Returns the content hashes of all stages that were run or stored.
+    """
+    todo = set()
+    stack = list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in todo:
+            todo.add(name)
+            stack.extend(STAGES[name][1])
+
+    os.makedirs(args.artifacts, exist_ok=True)
+    digests, running = {}, {}
+    with ThreadPoolExecutor(args.jobs) as pool:
+        while todo or running:
+            for name in [n for n in todo
+                         if all(need in digests for need in STAGES[n][1])]:
+                todo.remove(name)
+                running[pool.submit(run_stage, name, dict(digests),
+                                    args)] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                digests[running.pop(future)] = future.result()
+    return digests
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('stages', nargs='*', default=['aggregate'],
+                        help='stages to run with the stages they need, '
+                             'default aggregate')
+    parser.add_argument('--force', nargs='*', choices=list(STAGES),
+                        default=[], help='rerun these stages anyway')
+    parser.add_argument('--artifacts', default='artifacts')
+    parser.add_argument('--data', default='data/spoken/')
+    parser.add_argument('--ignore-longer', type=int, default=1300,
+                        help='do not parse Conversations with more lines')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='stages running at the same time')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='processes scoring CASSIM')
+    parser.add_argument('--out', default='cassim_pickles.p',
+                        help='Conversations with scores, see notebook')
+    parser.add_argument('--liwc-out', default='liwc_reports.txt')
+    args = parser.parse_args()
+    for stage in args.stages:
+        if stage not in STAGES:
+            parser.error(f'unknown stage {stage}, choose from {list(STAGES)}')
+
+    digests = run(args.stages, args)
+    if 'aggregate' in digests:
+        conversations, reports = _load(digests['aggregate'], args)
+        with open(args.out, 'wb') as f:
+            pickle.dump(conversations, f)
+        write_reports(reports, args.liwc_out)
@@ -0,0 +1,59 @@
+"""File: test_pipeline.py
+
+Authors: Mattijs Blankesteijn & András Csirik
+Computational Dialogue Modelling 2020
+
+This file contains tests of the stored stages of pipeline.py on a small
+made up corpus in the BNC2014 layout. Run with:
+$ python3 -m pytest test_pipeline.py
+"""
+
+import os
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+SPEAKERS = ['S0024', 'S0041', 'S0144', 'S0192', 'S0201', 'S0330']
+
+
+def make_data(root):
+    """Write tagged files and speaker metadata, returns the data folder."""
+    os.makedirs(root / 'tagged')
+    os.makedirs(root / 'metadata')
+    with open(root / 'metadata' / 'speakerInfo.xml', 'w') as f:
+        f.write('<speakers>')
+        for i, speaker in enumerate(SPEAKERS):
+            f.write(f'<speaker id="{speaker}"><exactage>{20 + i}</exactage>'
+                    f'<gender>{"FM"[i % 2]}</gender><l1>English</l1>'
+                    f'<nat>British</nat></speaker>')
+        f.write('</speakers>')
+
+    for n in range(3):
+        with open(root / 'tagged' / f'S{n}AB-tgd.xml', 'w') as f:
+            f.write('<text>')
+            for speaker in SPEAKERS[n:]:
+                f.write(f'<u who="{speaker}">yeah</u>')
+            f.write('</text>')
+    return str(root) + os.sep
+
+
+def ingest_digest(data, artifacts, seed):
+    """Content hash of a forced ingest in a process with its own seed."""
+    code = ('import argparse, pipeline\n'
+            'args = argparse.Namespace(artifacts=%r, data=%r, '
+            'force=["ingest"])\n'
+            'print(pipeline.run_stage("ingest", {}, args))' %
+            (artifacts, data))
+    env = dict(os.environ, PYTHONHASHSEED=seed)
+    out = subprocess.run([sys.executable, '-c', code], cwd=REPO, env=env,
+                         capture_output=True, text=True, check=True)
+    return out.stdout.split()[-1]
+
+
+def test_ingest_is_canonical(tmp_path):
+    data = make_data(tmp_path / 'data')
+    artifacts = str(tmp_path / 'artifacts')
+    os.makedirs(artifacts)
+
+    digests = {ingest_digest(data, artifacts, seed) for seed in '123'}
+    assert len(digests) == 1
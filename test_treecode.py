@@ -0,0 +1,126 @@
+"""File: test_treecode.py
+
+Authors: Mattijs Blankesteijn & András Csirik
+Computational Dialogue Modelling 2020
+
+This file contains tests of treecode.py against zss, which CASSIM used
+before. Run with:
+$ python3 -m pytest test_treecode.py
+"""
+
+import random
+import tracemalloc
+from collections import OrderedDict
+
+import pytest
+from nltk.tree import ParentedTree, Tree
+from zss import Node, simple_distance
+
+import treecode
+
+LABELS = ['ROOT', 'S', 'NP', 'VP', 'PP', 'NN', 'DT', 'UH', 'INTJ']
+
+
+def random_tree(rng, depth=0):
+    """Random bracketed tree with words as leaves."""
+    if depth > 3 or rng.random() < 0.3:
+        return f'({rng.choice(LABELS)} w)'
+    kids = ' '.join(random_tree(rng, depth + 1)
+                    for _ in range(rng.randint(1, 3)))
+    return f'({rng.choice(LABELS)} {kids})'
+
+
+def to_zss(tree):
+    """zss tree without words, as the original CASSIM built it."""
+    node = Node(tree.label())
+    for kid in tree:
+        if isinstance(kid, Tree):
+            node.addkid(to_zss(kid))
+    return node
+
+
+def random_chain(rng):
+    """Random tree in which every node has at most one child."""
+    tree = 'w'
+    for _ in range(rng.randint(1, 4)):
+        tree = f'({rng.choice(LABELS)} {tree})'
+    return tree
+
+
+def random_pairs(n=300, seed=0):
+    """Pairs of random trees, some of them identical."""
+    rng = random.Random(seed)
+    for _ in range(n):
+        a = random_tree(rng)
+        yield a, a if rng.random() < 0.2 else random_tree(rng)
+
+
+def test_distance_equals_zss():
+    for a, b in random_pairs():
+        expected = simple_distance(to_zss(ParentedTree.fromstring(a)),
+                                   to_zss(ParentedTree.fromstring(b)))
+        assert treecode.distance(treecode.encode(a),
+                                 treecode.encode(b)) == expected
+
+
+def test_cached_distance_equals_distance():
+    rng = random.Random(1)
+    pairs = list(random_pairs()) + [(random_chain(rng), random_tree(rng))
+                                    for _ in range(300)]
+    for a, b in pairs + pairs:
+        a, b = treecode.encode(a), treecode.encode(b)
+        assert treecode.cached_distance(a, b) == treecode.distance(a, b)
+        assert treecode.cached_distance(b, a) == treecode.distance(a, b)
+
+
+def test_cache_size(monkeypatch):
+    monkeypatch.setattr(treecode, 'CACHE_SIZE', 10)
+    monkeypatch.setattr(treecode, '_cache', OrderedDict())
+    for a, b in random_pairs():
+        treecode.cached_distance(treecode.encode(a), treecode.encode(b))
+    assert len(treecode._cache) <= 10
+
+
+def test_size_counts_words():
+    tree = treecode.encode('(ROOT (S (NP (PRP I)) (VP (VBP sleep))))')
+    assert len(tree.labels) == 6
+    assert tree.size == 7
+
+
+def test_save_load(tmp_path):
+    trees = [treecode.encode(a) for a, _ in random_pairs(50)]
+    path = str(tmp_path / 'trees')
+    treecode.save(trees, path)
+    loaded = treecode.load(path)
+
+    for tree, other in zip(trees, loaded):
+        assert tree.size == other.size
+        assert (tree.keyroots == other.keyroots).all()
+        assert treecode.distance(tree, trees[0]) == \
+            treecode.distance(other, loaded[0])
+
+
+def test_load_is_lazy(tmp_path):
+    trees = [treecode.encode('(ROOT (S (NP (PRP I)) (VP (VBP sleep))))'),
+             treecode.encode('(ROOT (INTJ (UH yeah)))')] * 50000
+    path = str(tmp_path / 'trees')
+    treecode.save(trees, path)
+
+    tracemalloc.start()
+    loaded = treecode.load(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Far less than a single byte per saved tree.
+    assert peak < len(trees)
+    assert len(loaded) == len(trees)
+    assert (loaded[-1].labels == trees[-1].labels).all()
+    assert (loaded[-1].keyroots == trees[-1].keyroots).all()
+
+
+def test_load_conflicting_labels(tmp_path, monkeypatch):
+    path = str(tmp_path / 'trees')
+    treecode.save([treecode.encode('(ROOT (UH yeah))')], path)
+    monkeypatch.setattr(treecode, 'LABELS', {'UH': 0, 'ROOT': 1})
+    with pytest.raises(ValueError):
+        treecode.load(path)
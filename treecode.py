@@ -0,0 +1,250 @@
+"""File: treecode.py
+
+Authors: Mattijs Blankesteijn & András Csirik
+Computational Dialogue Modelling 2020
+
+This file contains integer coded constituency trees for CASSIM.
+
+Labels such as 'NP' and 'VP' are interned to small integers in one global
+vocabulary, and a tree is stored as flat arrays in postorder: the label of
+each node, the index of its leftmost leaf and the keyroots. The tree edit
+distance of Zhang & Shasha (1989) then only compares integers, and gives the
+same result as zss.simple_distance on the trees cassim.py used to build.
+
+Trees can be saved to and memory mapped from .npy files, so forked worker
+processes share a single copy of the arrays.
+
+Spoken data repeats many small trees (e.g. backchannels), so
+cached_distance skips identical trees, has a cheaper exact distance for
+chains such as (ROOT (INTJ (UH yeah))) and remembers recent distances
+between tree shapes.
+"""
+
+import hashlib
+import pickle
+from collections import OrderedDict, namedtuple
+from collections.abc import Sequence
+
+import numpy as np
+from nltk.tree import ParentedTree, Tree
+
+# Global vocabulary from label to integer code.
+LABELS = {}
+
+# Least recently used distances by pair of tree shapes, see
+# cached_distance. An entry takes about 200 bytes.
+CACHE_SIZE = 2 ** 18
+_cache = OrderedDict()
+
+CodedTree = namedtuple('CodedTree', ['labels', 'lmld', 'keyroots', 'size'])
+CodedTree.__doc__ = """Postorder label codes, leftmost leaf indices and
+keyroots of a tree. Size counts all nodes below the root, words included,
+which is how CASSIM normalizes the edit distance."""
+
+
+def intern(label):
+    """Returns the integer code of label, adding it to LABELS if new."""
+    return LABELS.setdefault(label, len(LABELS))
+
+
+def encode(tree):
+    """Encode an nltk tree or bracketed string as CodedTree.
+
+    Words are not part of the coded tree, like in the zss trees of CASSIM.
+    A CodedTree is returned as is.
+    """
+    if isinstance(tree, CodedTree):
+        return tree
+    if isinstance(tree, str):
+        tree = ParentedTree.fromstring(tree)
+    labels, lmld = [], []
+
+    def walk(node):
+        """Postorder walk, returns leftmost leaf index of node."""
+        first = None
+        for kid in node:
+            if isinstance(kid, Tree):
+                leaf = walk(kid)
+                if first is None:
+                    first = leaf
+        labels.append(intern(node.label()))
+        lmld.append(len(labels) - 1 if first is None else first)
+        return lmld[-1]
+
+    walk(tree)
+    # The keyroot of a leftmost leaf is the highest node that has it.
+    keyroots = sorted({l: i for i, l in enumerate(lmld)}.values())
+    return CodedTree(np.array(labels, dtype=np.int32),
+                     np.array(lmld, dtype=np.int32),
+                     np.array(keyroots, dtype=np.int32),
+                     len(tree.treepositions()) - 1)
+
+
+def distance(a, b):
+    """Zhang-Shasha tree edit distance with unit costs between CodedTrees."""
+    al, alm, akr = a.labels.tolist(), a.lmld.tolist(), a.keyroots.tolist()
+    bl, blm, bkr = b.labels.tolist(), b.lmld.tolist(), b.keyroots.tolist()
+    treedists = [[0] * len(bl) for _ in al]
+
+    for i in akr:
+        for j in bkr:
+            ioff, joff = alm[i] - 1, blm[j] - 1
+            m, n = i - ioff, j - joff
+            fd = [[0] * (n + 1) for _ in range(m + 1)]
+            for x in range(1, m + 1):
+                fd[x][0] = fd[x - 1][0] + 1
+            for y in range(1, n + 1):
+                fd[0][y] = fd[0][y - 1] + 1
+
+            for x in range(1, m + 1):
+                row, prev = fd[x], fd[x - 1]
+                ax, lx = x + ioff, alm[x + ioff]
+                for y in range(1, n + 1):
+                    by = y + joff
+                    if lx == alm[i] and blm[by] == blm[j]:
+                        row[y] = min(prev[y] + 1, row[y - 1] + 1,
+                                     prev[y - 1] + (al[ax] != bl[by]))
+                        treedists[ax][by] = row[y]
+                    else:
+                        p, q = lx - 1 - ioff, blm[by] - 1 - joff
+                        row[y] = min(prev[y] + 1, row[y - 1] + 1,
+                                     fd[p][q] + treedists[ax][by])
+
+    return treedists[-1][-1]
+
+
+def shape(tree):
+    """Digest of a CodedTree, equal only for identical trees."""
+    return hashlib.blake2b(tree.labels.tobytes() + tree.lmld.tobytes(),
+                           digest_size=16).digest()
+
+
+def is_chain(tree):
+    """Whether every node of a CodedTree has at most one child."""
+    # Only nodes on the leftmost path have the first node as leftmost leaf.
+    return not tree.lmld.any()
+
+
+def chain_distance(a, b):
+    """Same as distance() for a chain a and any CodedTree b.
+
+    Nodes of a chain can only be mapped to nodes on one path down from the
+    root of b, in the same order. Every mapped pair saves 2 operations if
+    the labels are equal and 1 otherwise, so the distance follows from the
+    best alignment of a with each path of b.
+    """
+    top_down = a.labels.tolist()[::-1]
+    bl, blm = b.labels.tolist(), b.lmld.tolist()
+
+    # Children from the postorder: the subtree of i spans lmld[i] to i.
+    children, stack = [[] for _ in bl], []
+    for i in range(len(bl)):
+        while stack and stack[-1] >= blm[i]:
+            children[i].append(stack.pop())
+        stack.append(i)
+
+    best = 0
+    todo = [(len(bl) - 1, [0] * (len(top_down) + 1))]
+    while todo:
+        node, above = todo.pop()
+        row = [0]
+        for x, label in enumerate(top_down, 1):
+            row.append(max(above[x], row[x - 1],
+                           above[x - 1] + 1 + (label == bl[node])))
+        best = max(best, row[-1])
+        todo.extend((kid, row) for kid in children[node])
+
+    return len(top_down) + len(bl) - best
+
+
+def cached_distance(a, b):
+    """Same as distance(), but skips or caches what it can.
+
+    Identical trees have distance 0 and chains use chain_distance. Other
+    distances are kept for the last CACHE_SIZE pairs of shapes used.
+    """
+    ka, kb = shape(a), shape(b)
+    if ka == kb:
+        return 0
+    # Unit costs make the distance symmetric.
+    if is_chain(b) and not is_chain(a):
+        a, b, ka, kb = b, a, kb, ka
+    if is_chain(a):
+        return chain_distance(a, b)
+
+    key = min(ka, kb) + max(ka, kb)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    _cache[key] = distance(a, b)
+    distance_ab = _cache[key]
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return distance_ab
+
+
+def save(trees, path):
+    """Save CodedTrees and LABELS in files whose names start with path.
+
+    Path.nodes.npy holds rows of labels and leftmost leaves of all trees
+    concatenated, and .keyroots.npy their keyroots. Path.trees.npy holds
+    rows of offsets into nodes, offsets into keyroots and sizes, with one
+    extra column that ends the last tree. LABELS goes to .labels.p.
+    """
+    offsets = np.cumsum([0] + [len(t.labels) for t in trees])
+    kr_offsets = np.cumsum([0] + [len(t.keyroots) for t in trees])
+    nodes = np.zeros((2, offsets[-1]), dtype=np.int32)
+    keyroots = np.zeros(kr_offsets[-1], dtype=np.int32)
+    for t, start, kr_start in zip(trees, offsets, kr_offsets):
+        nodes[0, start:start + len(t.labels)] = t.labels
+        nodes[1, start:start + len(t.labels)] = t.lmld
+        keyroots[kr_start:kr_start + len(t.keyroots)] = t.keyroots
+
+    np.save(path + '.nodes.npy', nodes)
+    np.save(path + '.keyroots.npy', keyroots)
+    np.save(path + '.trees.npy',
+            np.array([offsets, kr_offsets, [t.size for t in trees] + [0]],
+                     dtype=np.int64))
+    with open(path + '.labels.p', 'wb') as f:
+        pickle.dump(LABELS, f)
+
+
+class SavedTrees(Sequence):
+    """CodedTrees saved by save(), made on demand from the saved arrays."""
+
+    def __init__(self, path, mmap_mode='r'):
+        """Open the arrays of the trees saved at path."""
+        self.nodes = np.load(path + '.nodes.npy', mmap_mode=mmap_mode)
+        self.keyroots = np.load(path + '.keyroots.npy', mmap_mode=mmap_mode)
+        self.trees = np.load(path + '.trees.npy', mmap_mode=mmap_mode)
+
+    def __len__(self):
+        """Number of saved trees."""
+        return self.trees.shape[1] - 1
+
+    def __getitem__(self, i):
+        """CodedTree of views on the saved arrays."""
+        i = range(len(self))[i]
+        start, end = self.trees[0, i:i + 2]
+        kr_start, kr_end = self.trees[1, i:i + 2]
+        return CodedTree(self.nodes[0, start:end], self.nodes[1, start:end],
+                         self.keyroots[kr_start:kr_end], int(self.trees[2, i]))
+
+
+def load(path, mmap_mode='r'):
+    """Load CodedTrees saved by save() as SavedTrees.
+
+    The arrays are memory mapped, and a CodedTree is only made when it is
+    used, so processes share the trees instead of each holding a copy.
+
+    LABELS is extended to the saved vocabulary, so new trees get codes that
+    agree with the loaded ones. Raises ValueError if labels were already
+    given other codes, as trees and cached distances would then disagree.
+    """
+    with open(path + '.labels.p', 'rb') as f:
+        labels = pickle.load(f)
+    if any(labels.get(label) != code for label, code in LABELS.items()):
+        raise ValueError(f'vocabulary of {path} conflicts with LABELS')
+    LABELS.update(labels)
+
+    return SavedTrees(path, mmap_mode)